@@ -0,0 +1,78 @@
+# cython: language_level=3
+"""
+Compiled fast path for the source-tree scan helpers.
+
+This mirrors the pure-Python _match_pattern/_scan_source in build_helper,
+which imports these versions when the extension has been built and falls
+back to its own otherwise. Keep the two in sync.
+"""
+import fnmatch
+import os
+
+# Suffixes of compiled extension modules picked up by the pack step
+# (duplicated from build_helper to avoid a circular import)
+_BINARY_SUFFIXES = (".pyd", ".so", ".dylib")
+
+
+def _match_pattern(str rel_path, str pattern):
+    """
+    Match a relative path against a glob-style pattern, component by component.
+    """
+
+    def _match(list parts, list pats):
+        cdef Py_ssize_t i
+        if not pats:
+            return not parts
+        if pats[0] == "**":
+            for i in range(len(parts) + 1):
+                if _match(parts[i:], pats[1:]):
+                    return True
+            return False
+        if not parts:
+            return False
+        return fnmatch.fnmatch(parts[0], pats[0]) and _match(parts[1:], pats[1:])
+
+    return _match(rel_path.split(os.sep), os.path.normpath(pattern).split(os.sep))
+
+
+def _scan_source(str source_dir, exclude_files=None, data_files=None):
+    """
+    Scan the source directory once and bucket entries for the compile and pack steps.
+    """
+    cdef list py_files = []
+    cdef list binaries = []
+    cdef list matched_data = []
+
+    norm_exclude_exact = frozenset(os.path.normpath(ex) for ex in exclude_files or [])
+    cdef tuple norm_exclude_prefixes = tuple(ex + os.sep for ex in norm_exclude_exact)
+    cdef list data_patterns = [os.path.normpath(p) for p in data_files or []]
+
+    def _walk(str rel, str abs_path):
+        cdef str rel_entry
+        cdef str name
+        try:
+            entries = os.scandir(abs_path)
+        except OSError:
+            # Skip unreadable directories, matching os.walk's default behavior
+            return
+        with entries:
+            for entry in entries:
+                name = entry.name
+                rel_entry = os.path.join(rel, name) if rel else name
+                if rel_entry in norm_exclude_exact or rel_entry.startswith(
+                    norm_exclude_prefixes
+                ):
+                    continue
+                for p in data_patterns:
+                    if _match_pattern(rel_entry, p):
+                        matched_data.append(rel_entry)
+                        break
+                if entry.is_dir(follow_symlinks=False):
+                    _walk(rel_entry, entry.path)
+                elif name.endswith(".py"):
+                    py_files.append(entry.path)
+                elif name.endswith(_BINARY_SUFFIXES):
+                    binaries.append((entry.path, rel if rel else "."))
+
+    _walk("", source_dir)
+    return py_files, binaries, matched_data
@@ -1,13 +1,72 @@
-import glob
+import concurrent.futures
+import fnmatch
+import functools
+import hashlib
+import json
 import os
+import re
 import shutil
+import stat
 import subprocess
 import sys
-from typing import List, Optional, Tuple
+import sysconfig
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
 
 from Cython.Build import cythonize
+from Cython.Distutils import build_ext as cython_build_ext
 from setuptools import Extension, setup
 
+# Suffixes of compiled extension modules picked up by the pack step
+_BINARY_SUFFIXES = (".pyd", ".so", ".dylib")
+
+# Tokenizes one requirements line: either a "-r <file>" include or a package
+# name with optional extras, version spec and trailing comment. Lines that are
+# blank, comment-only or other pip options simply do not match.
+_REQ_RE = re.compile(
+    r"^[ \t]*(?:-r[ \t]+(?P<inc>\S+)"
+    r"|(?P<pkg>[A-Za-z0-9_.\-]+)(?:\[[^\]]*\])?[ \t]*(?:[<>=!~;].*)?)"
+    r"[ \t]*(?:#.*)?$",
+    re.MULTILINE,
+)
+
+
+@dataclass
+class CompileResult:
+    """
+    Artifacts produced by a compile() run.
+
+    Passing this to pack() lets it reuse the lists instead of rescanning the
+    compiled tree.
+
+    Attributes:
+        dist_dir (str): The directory holding the compiled output.
+        binaries (List[Tuple[str, str]]): (source_path, dest_dir) pairs of produced extension modules.
+        main_file (Optional[str]): The main file (relative to dist_dir), if one was copied.
+        data_files (List[str]): Data files/directories copied into dist_dir (relative paths).
+    """
+
+    dist_dir: str
+    binaries: List[Tuple[str, str]] = field(default_factory=list)
+    main_file: Optional[str] = None
+    data_files: List[str] = field(default_factory=list)
+
+
+def _resolve_jobs(jobs: Optional[int] = None) -> int:
+    """
+    Resolve the number of parallel jobs to use for building.
+
+    Args:
+        jobs (Optional[int]): The requested number of jobs. If None, fall back to
+            the PYBUILDHELPER_JOBS environment variable, then to os.cpu_count().
+
+    Returns:
+        int: The number of jobs to use (at least 1).
+    """
+    if jobs is None:
+        jobs = int(os.environ.get("PYBUILDHELPER_JOBS", os.cpu_count() or 1))
+    return max(1, jobs)
+
 
 def _clean_directory(dir_path: str) -> None:
     """
@@ -21,85 +80,144 @@ def _clean_directory(dir_path: str) -> None:
     os.makedirs(dir_path, exist_ok=True)
 
 
-def _find_py_files(
-    source_dir: str, exclude_files: Optional[List[str]] = None
-) -> List[str]:
+def _cached_stat(
+    path: str, cache: Dict[str, Optional[os.stat_result]]
+) -> Optional[os.stat_result]:
     """
-    Find all Python files in the source directory, excluding specified files/directories.
+    Stat a path, memoizing the result by absolute normalized path.
 
     Args:
-        source_dir (str): The root directory to search for Python files.
-        exclude_files (Optional[List[str]]): A list of files/directories to exclude (relative to source_dir).
+        path (str): The path to stat.
+        cache (Dict[str, Optional[os.stat_result]]): The per-invocation cache.
 
     Returns:
-        List[str]: A list of absolute paths to Python files.
+        Optional[os.stat_result]: The stat result, or None if the path does not exist.
     """
-    py_files: List[str] = []
-    exclude_files = exclude_files or []
-
-    for root, _, files in os.walk(source_dir):
-        # Skip excluded directories
-        rel_root = os.path.relpath(root, source_dir)
-        if any(
-            rel_root.startswith(ex) or rel_root == ex
-            for ex in exclude_files
-            if os.path.isdir(os.path.join(source_dir, ex))
-        ):
-            continue
+    key = os.path.normpath(os.path.abspath(path))
+    if key not in cache:
+        try:
+            cache[key] = os.stat(key)
+        except OSError:
+            cache[key] = None
+    return cache[key]
 
-        for file in files:
-            if file.endswith(".py"):
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, source_dir)
 
-                # Skip excluded files
-                if not any(
-                    rel_path == ex or rel_path.startswith(ex + os.sep)
-                    for ex in exclude_files
-                ):
-                    py_files.append(file_path)
+def _match_pattern(rel_path: str, pattern: str) -> bool:
+    """
+    Match a relative path against a glob-style pattern, component by component.
 
-    return py_files
+    Args:
+        rel_path (str): The relative path to test.
+        pattern (str): A glob pattern. Supports '**' to match any number of directories.
+
+    Returns:
+        bool: True if the path matches the pattern.
+    """
 
+    def _match(parts: List[str], pats: List[str]) -> bool:
+        if not pats:
+            return not parts
+        if pats[0] == "**":
+            return any(_match(parts[i:], pats[1:]) for i in range(len(parts) + 1))
+        if not parts:
+            return False
+        return fnmatch.fnmatch(parts[0], pats[0]) and _match(parts[1:], pats[1:])
 
-def _find_binary_files(
-    source_dir: str, exclude_files: Optional[List[str]] = None
-) -> List[Tuple[str, str]]:
+    return _match(rel_path.split(os.sep), os.path.normpath(pattern).split(os.sep))
+
+
+def _scan_source(
+    source_dir: str,
+    exclude_files: Optional[List[str]] = None,
+    data_files: Optional[List[str]] = None,
+) -> Tuple[List[str], List[Tuple[str, str]], List[str]]:
     """
-    Find all binary files (e.g., .pyd, .so, .dylib) in the source directory.
+    Scan the source directory once and bucket entries for the compile and pack steps.
 
     Args:
-        source_dir (str): The root directory to search for binary files.
+        source_dir (str): The root directory to scan.
         exclude_files (Optional[List[str]]): A list of files/directories to exclude (relative to source_dir).
+        data_files (Optional[List[str]]): A list of data files/directories to match (relative to source_dir). Support wildcards.
 
     Returns:
-        List[Tuple[str, str]]: A list of tuples (source_path, dest_dir) for each binary file found.
+        Tuple[List[str], List[Tuple[str, str]], List[str]]: A tuple of
+            (absolute paths to Python files,
+             (source_path, dest_dir) pairs for binary files,
+             relative paths to matched data files/directories).
     """
-    binary_exts = ("*.pyd", "*.so", "*.dylib")
-    exclude_files = exclude_files or []
-    results: List[Tuple[str, str]] = []
-
-    for ext in binary_exts:
-        for filepath in glob.glob(os.path.join(source_dir, "**", ext), recursive=True):
-            rel_path = os.path.relpath(filepath, source_dir)
-
-            should_exclude = any(
-                os.path.normpath(rel_path).startswith(os.path.normpath(ex))
-                for ex in exclude_files
-            )
-            if should_exclude:
-                continue
-
-            rel_dir = os.path.relpath(os.path.dirname(filepath), source_dir)
-            dest_dir = rel_dir if rel_dir != "." else "."
+    py_files: List[str] = []
+    binaries: List[Tuple[str, str]] = []
+    matched_data: List[str] = []
+
+    # Precompute the exclude set and data patterns once; the walk below never
+    # re-normalizes paths or re-stats excluded entries. Exact matches are
+    # hashed, prefix matches use one C-level startswith against a tuple.
+    norm_exclude_exact = frozenset(os.path.normpath(ex) for ex in exclude_files or [])
+    norm_exclude_prefixes = tuple(ex + os.sep for ex in norm_exclude_exact)
+    data_patterns = [os.path.normpath(p) for p in data_files or []]
+
+    def _walk(rel: str, abs_path: str) -> None:
+        try:
+            entries = os.scandir(abs_path)
+        except OSError:
+            # Skip unreadable directories, matching os.walk's default behavior
+            return
+        with entries:
+            for entry in entries:
+                rel_entry = os.path.join(rel, entry.name) if rel else entry.name
+                if rel_entry in norm_exclude_exact or rel_entry.startswith(
+                    norm_exclude_prefixes
+                ):
+                    continue
+                if any(_match_pattern(rel_entry, p) for p in data_patterns):
+                    matched_data.append(rel_entry)
+                # is_dir() reuses the type cached in the DirEntry (no extra stat),
+                # and excluded directories are pruned before descending.
+                if entry.is_dir(follow_symlinks=False):
+                    _walk(rel_entry, entry.path)
+                elif entry.name.endswith(".py"):
+                    py_files.append(entry.path)
+                elif entry.name.endswith(_BINARY_SUFFIXES):
+                    binaries.append((entry.path, rel if rel else "."))
+
+    _walk("", source_dir)
+    return py_files, binaries, matched_data
+
+
+try:
+    # Compiled fast path; the pure-Python versions above stay in place when
+    # the extension has not been built
+    from ._walk import _match_pattern, _scan_source  # noqa: F811
+except ImportError:
+    pass
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    Copy a file by hardlinking when possible, falling back to a byte copy.
 
-            results.append((filepath, dest_dir))
+    Hardlinks are O(1) regardless of file size and are safe here because the
+    sources are build inputs or intermediate build outputs. The fallback
+    covers cross-device links (EXDEV), Windows permission errors and
+    filesystems without hardlink support.
 
-    return results
+    Args:
+        src (str): The source file path.
+        dst (str): The destination file path.
+    """
+    try:
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
 
 
 def _copy_data_files(
-    source_dir: str, dest_dir: str, data_files: Optional[List[str]] = None
+    source_dir: str,
+    dest_dir: str,
+    data_files: Optional[List[str]] = None,
+    stat_cache: Optional[Dict[str, Optional[os.stat_result]]] = None,
 ) -> None:
     """
     Copy specified data files/directories from source to destination.
@@ -108,29 +226,70 @@ def _copy_data_files(
         source_dir (str): The root source directory.
         dest_dir (str): The root destination directory.
         data_files (Optional[List[str]]): A list of files/directories to copy (relative to source_dir).
+        stat_cache (Optional[Dict[str, Optional[os.stat_result]]]): A cache of stat results shared across the build phase.
     """
     if not data_files:
         return
 
+    if stat_cache is None:
+        stat_cache = {}
+
     for data in data_files:
         src_path = os.path.join(source_dir, data)
-        if not os.path.exists(src_path):
+        # One cached stat answers both the existence and the directory check
+        src_stat = _cached_stat(src_path, stat_cache)
+        if src_stat is None:
             continue
 
         dest_path = os.path.join(dest_dir, data)
         os.makedirs(os.path.dirname(dest_path), exist_ok=True)
 
-        if os.path.isdir(src_path):
-            shutil.copytree(src_path, dest_path, dirs_exist_ok=True)
+        if stat.S_ISDIR(src_stat.st_mode):
+            shutil.copytree(
+                src_path, dest_path, dirs_exist_ok=True, copy_function=_link_or_copy
+            )
         else:
-            shutil.copy2(src_path, dest_path)
+            _link_or_copy(src_path, dest_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_requirements_file(abs_path: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Parse a single requirements file, memoized by absolute path.
+
+    Args:
+        abs_path (str): The absolute path of the requirements file.
+
+    Returns:
+        Tuple[Tuple[str, ...], Tuple[str, ...]]: A tuple of (absolute paths included via -r, package names).
+    """
+    includes: List[str] = []
+    packages: List[str] = []
+    base_dir = os.path.dirname(abs_path)
+    with open(abs_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    # One pass of the compiled regex over the whole file instead of
+    # Python-level per-line strip/startswith/partition chains
+    for match in _REQ_RE.finditer(text):
+        sub_requirements_file = match.group("inc")
+        if sub_requirements_file is not None:
+            # -r includes are resolved relative to the including file as pip does
+            includes.append(
+                os.path.normpath(os.path.join(base_dir, sub_requirements_file))
+            )
+        else:
+            packages.append(match.group("pkg"))
+    return tuple(includes), tuple(packages)
 
 
 def _get_hidden_imports_from_requirements(
     requirements_file: str,
 ) -> List[str]:
     """
-    Read hidden imports from a requirements file.
+    Read hidden imports from a requirements file, following -r includes.
+
+    Each unique file is parsed at most once per process and -r cycles are
+    skipped, so diamond-shaped include graphs stay O(unique files).
 
     Args:
         requirements_file (str): The path to the requirements file.
@@ -139,40 +298,118 @@ def _get_hidden_imports_from_requirements(
         List[str]: A list of hidden imports.
     """
     hidden_imports: List[str] = []
-    with open(requirements_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("-r"):
-                # Handle -r option to include requirements from another file
-                sub_requirements_file = line.split(" ")[1]
-                hidden_imports.extend(
-                    _get_hidden_imports_from_requirements(sub_requirements_file)
-                )
-            elif line:
-                # Add package name as hidden import
-                hidden_imports.append(line.split("==")[0]) # Ignore version
+    visited: Set[str] = set()
+    pending: List[str] = [os.path.abspath(requirements_file)]
+    while pending:
+        path = pending.pop(0)
+        if path in visited:
+            continue
+        visited.add(path)
+        includes, packages = _parse_requirements_file(path)
+        hidden_imports.extend(packages)
+        pending.extend(includes)
     return hidden_imports
 
 
-def _expand_wildcards(source_dir: str, data_files: Optional[List[str]]) -> List[str]:
+def _content_key(py_file: str, module_name: str, flags_repr: str) -> str:
     """
-    Expand wildcards in data_files using glob.
+    Build a cache key from a source file's bytes, its module name and the compiler flags.
+
+    The module name is part of the key because the compiled artifact embeds it
+    (PyInit_<name>); two identical sources compiled as different modules (e.g.
+    matching __init__.py files in different packages) must not share a slot.
 
     Args:
-        source_dir (str): The root source directory.
-        data_files (Optional[List[str]]): A list of files/directories with possible wildcards.
+        py_file (str): The Python source file to hash.
+        module_name (str): The dotted module name the file is compiled as.
+        flags_repr (str): A canonical representation of the compiler configuration.
 
     Returns:
-        List[str]: A list of expanded file paths.
+        str: A hex digest identifying this (source, module, flags) combination.
     """
-    if not data_files:
-        return []
-    expanded_files = []
-    for pattern in data_files:
-        full_pattern = os.path.join(source_dir, pattern)
-        matches = glob.glob(full_pattern, recursive=True)
-        expanded_files.extend(matches)
-    return expanded_files
+    digest = hashlib.sha256()
+    digest.update(module_name.encode("utf-8"))
+    digest.update(flags_repr.encode("utf-8"))
+    with open(py_file, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_build_cache(cache_dir: str) -> Dict[str, str]:
+    """
+    Load the build cache index mapping content keys to cached artifact names.
+
+    Args:
+        cache_dir (str): The cache directory under intermediate_dir.
+
+    Returns:
+        Dict[str, str]: The index, empty if missing or unreadable.
+    """
+    try:
+        with open(
+            os.path.join(cache_dir, "index.json"), "r", encoding="utf-8"
+        ) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_build_cache(cache_dir: str, index: Dict[str, str]) -> None:
+    """
+    Persist the build cache index.
+
+    Args:
+        cache_dir (str): The cache directory under intermediate_dir.
+        index (Dict[str, str]): The index mapping content keys to cached artifact names.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+
+def _compile_pipelined(
+    ext_modules: List[Extension],
+    intermediate_dir: str,
+    dist_dir: str,
+    jobs: int,
+) -> None:
+    """
+    Overlap Cython code generation and C compilation across module batches.
+
+    While one batch's C sources are compiled by build_ext in a background
+    thread, the next batch is already being cythonized, removing the serial
+    barrier between the two phases. setup() runs on a single worker thread
+    because distutils command state is process-global.
+
+    Args:
+        ext_modules (List[Extension]): The extensions to build.
+        intermediate_dir (str): The directory for intermediate build files.
+        dist_dir (str): The directory for final compiled files.
+        jobs (int): The number of parallel jobs within each batch.
+    """
+    batch_size = max(1, jobs)
+
+    def _build(cythonized: List[Extension]) -> None:
+        setup(
+            ext_modules=cythonized,
+            cmdclass={"build_ext": cython_build_ext},
+            script_args=["build_ext", "-j", str(jobs), "--build-lib", dist_dir],
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as builder:
+        pending = None
+        for start in range(0, len(ext_modules), batch_size):
+            cythonized = cythonize(
+                ext_modules[start : start + batch_size],
+                build_dir=intermediate_dir,
+                compiler_directives={"language_level": "3"},
+                nthreads=jobs,
+            )
+            if pending is not None:
+                pending.result()
+            pending = builder.submit(_build, cythonized)
+        if pending is not None:
+            pending.result()
 
 
 def compile(
@@ -182,7 +419,11 @@ def compile(
     source_dir: str = ".",
     intermediate_dir: str = "build",
     dist_dir: str = "dist",
-) -> None:
+    jobs: Optional[int] = None,
+    incremental: bool = True,
+    force: bool = False,
+    pipeline: bool = False,
+) -> CompileResult:
     """
     Use Cython to compile all Python files in the source directory.
 
@@ -193,43 +434,206 @@ def compile(
         source_dir (str): The source directory containing Python files.
         intermediate_dir (str): The directory for intermediate build files.
         dist_dir (str): The directory for final compiled files.
+        jobs (Optional[int]): The number of parallel jobs for Cython code generation and C compilation. Defaults to the PYBUILDHELPER_JOBS environment variable or the CPU count.
+        incremental (bool): If True, keep previous build artifacts so Cython's timestamp check skips up-to-date modules. Set CC="ccache gcc" to also cache the C compile step across runs.
+        force (bool): If True, clean intermediate_dir and dist_dir and rebuild everything from scratch.
+        pipeline (bool): If True, overlap Cython code generation and C compilation across module batches instead of running the two phases back to back.
+
+    Returns:
+        CompileResult: The produced artifacts, reusable by pack() to skip rescanning the compiled tree.
     """
-    # Clean and create directories
-    _clean_directory(intermediate_dir)
-    _clean_directory(dist_dir)
+    jobs = _resolve_jobs(jobs)
+
+    # Fresh stat cache per invocation
+    stat_cache: Dict[str, Optional[os.stat_result]] = {}
 
-    # Find all Python files to compile
-    py_files = _find_py_files(source_dir, exclude_files)
+    # Clean and create directories. Incremental builds keep prior artifacts so
+    # unchanged modules are no-ops.
+    if force or not incremental:
+        _clean_directory(intermediate_dir)
+        _clean_directory(dist_dir)
+    else:
+        os.makedirs(intermediate_dir, exist_ok=True)
+        os.makedirs(dist_dir, exist_ok=True)
 
-    # Convert Python files to C extensions
+    # Keep the build output directories out of the scan: with incremental
+    # builds they survive between runs and sit under source_dir by default,
+    # so a second run would otherwise compile its own previous output
+    scan_excludes = list(exclude_files or [])
+    abs_source_dir = os.path.abspath(source_dir)
+    for out_dir in (intermediate_dir, dist_dir):
+        rel_out = os.path.relpath(os.path.abspath(out_dir), abs_source_dir)
+        if rel_out != "." and not rel_out.startswith(".." + os.sep) and rel_out != "..":
+            scan_excludes.append(rel_out)
+
+    # Scan the tree once for Python files to compile and data files to copy
+    py_files, _, expanded_data_files = _scan_source(
+        source_dir, scan_excludes, data_files
+    )
+
+    # Content-hash build cache: modules whose (source bytes, flags) key is
+    # already cached are linked straight into dist_dir and never rebuilt,
+    # even when only the mtime changed (e.g. after git checkout)
+    compiler_directives = {"language_level": "3"}
+    ext_suffix = sysconfig.get_config_var("EXT_SUFFIX") or ".so"
+    flags_repr = repr(sorted(compiler_directives.items())) + ext_suffix
+    cache_dir = os.path.join(intermediate_dir, ".cache")
+    cache_index = _load_build_cache(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Convert Python files to C extensions, recording where each compiled
+    # module will land so pack() does not have to rescan the output tree
     ext_modules: List[Extension] = []
+    binaries: List[Tuple[str, str]] = []
+    needs_build: List[Tuple[str, str]] = []  # (content key, built path)
+    # source_dir is constant through the loop, so relative paths are a single
+    # slice off the shared prefix instead of an os.path.relpath call per file
+    src_prefix = os.path.join(source_dir, "")
     for py_file in py_files:
-        rel_path = os.path.relpath(py_file, source_dir)
-        module_name = rel_path.replace(".py", "").replace(os.sep, ".")
+        rel_path = (
+            py_file[len(src_prefix):]
+            if py_file.startswith(src_prefix)
+            else os.path.relpath(py_file, source_dir)
+        )
+        rel_base = rel_path.replace(".py", "")
+        module_name = rel_base.replace(os.sep, ".")
+        built_path = os.path.abspath(os.path.join(dist_dir, rel_base + ext_suffix))
+        rel_dir = os.path.dirname(rel_path)
+        binaries.append((built_path, rel_dir if rel_dir else "."))
+
+        key = _content_key(py_file, module_name, flags_repr)
+        cached = cache_index.get(key)
+        if cached is not None:
+            cache_path = os.path.join(cache_dir, cached)
+            if os.path.exists(cache_path):
+                os.makedirs(os.path.dirname(built_path), exist_ok=True)
+                _link_or_copy(cache_path, built_path)
+                continue
         ext_modules.append(Extension(module_name, [py_file]))
+        needs_build.append((key, built_path))
 
-    # Compile with Cython
-    setup(
-        ext_modules=cythonize(
-            ext_modules,
-            build_dir=intermediate_dir,
-            compiler_directives={"language_level": "3"},
-        ),
-        script_args=["build_ext", "--build-lib", dist_dir],
-    )
+    if not ext_modules:
+        pass  # Everything was served from the build cache
+    elif pipeline and len(ext_modules) > 1:
+        _compile_pipelined(ext_modules, intermediate_dir, dist_dir, jobs)
+    else:
+        # Compile with Cython, parallelizing the py->c generation across cores.
+        # Note: nthreads only parallelizes code generation, not the C compile step.
+        setup(
+            ext_modules=cythonize(
+                ext_modules,
+                build_dir=intermediate_dir,
+                compiler_directives=compiler_directives,
+                nthreads=jobs,
+            ),
+            # Cython's build_ext honors -j (--parallel) for the C compile step,
+            # which is usually the dominant cost of the build.
+            cmdclass={"build_ext": cython_build_ext},
+            script_args=["build_ext", "-j", str(jobs), "--build-lib", dist_dir],
+        )
 
-    # Copy main file if specified
+    # Insert freshly built modules into the cache under their content keys
+    if needs_build:
+        for key, built_path in needs_build:
+            if os.path.exists(built_path):
+                cache_name = key + ext_suffix
+                _link_or_copy(built_path, os.path.join(cache_dir, cache_name))
+                cache_index[key] = cache_name
+        _save_build_cache(cache_dir, cache_index)
+
+    # Copy main file if specified (hardlinked when possible; PyInstaller only
+    # re-reads it in the pack step)
     if main_file:
-        shutil.copy2(
+        _link_or_copy(
             os.path.join(source_dir, main_file), os.path.join(dist_dir, main_file)
         )
 
     # Copy data files
-    expanded_data_files = _expand_wildcards(source_dir, data_files)
-    _copy_data_files(source_dir, dist_dir, expanded_data_files)
+    _copy_data_files(source_dir, dist_dir, expanded_data_files, stat_cache)
 
     print(f"Compilation complete. Compiled files are in {dist_dir}")
 
+    return CompileResult(
+        dist_dir=dist_dir,
+        binaries=binaries,
+        main_file=main_file,
+        data_files=expanded_data_files,
+    )
+
+
+def _write_spec_file(
+    spec_path: str,
+    main_script: str,
+    binaries: List[Tuple[str, str]],
+    datas: List[Tuple[str, str]],
+    hidden_imports: List[str],
+    excluded_modules: List[str],
+    executable_name: str,
+    onefile: bool,
+) -> None:
+    """
+    Write a PyInstaller spec file describing the package.
+
+    PyInstaller parses its CLI into an Analysis(...) call anyway; writing the
+    spec directly skips the argv round-trip, keeps the invocation short no
+    matter how many binaries and data files there are, and leaves a diffable
+    artifact whose hash can serve as a cache key for incremental rebuilds.
+
+    Args:
+        spec_path (str): Where to write the spec file.
+        main_script (str): Absolute path of the main script.
+        binaries (List[Tuple[str, str]]): (source_path, dest_dir) pairs of binary files.
+        datas (List[Tuple[str, str]]): (source_path, dest_dir) pairs of data files/directories.
+        hidden_imports (List[str]): Modules to force-include.
+        excluded_modules (List[str]): Modules to exclude.
+        executable_name (str): The name of the final executable.
+        onefile (bool): If True, emit a single-file EXE; otherwise EXE plus COLLECT.
+    """
+    header = (
+        "# -*- mode: python ; coding: utf-8 -*-\n"
+        "# Generated by pybuildhelper; regenerated on every pack() run.\n\n"
+        "a = Analysis(\n"
+        f"    [{main_script!r}],\n"
+        "    pathex=[],\n"
+        f"    binaries={binaries!r},\n"
+        f"    datas={datas!r},\n"
+        f"    hiddenimports={hidden_imports!r},\n"
+        "    hookspath=[],\n"
+        "    runtime_hooks=[],\n"
+        f"    excludes={excluded_modules!r},\n"
+        ")\n"
+        "pyz = PYZ(a.pure)\n"
+    )
+    if onefile:
+        body = (
+            "exe = EXE(\n"
+            "    pyz,\n"
+            "    a.scripts,\n"
+            "    a.binaries,\n"
+            "    a.datas,\n"
+            f"    name={executable_name!r},\n"
+            "    console=True,\n"
+            ")\n"
+        )
+    else:
+        body = (
+            "exe = EXE(\n"
+            "    pyz,\n"
+            "    a.scripts,\n"
+            "    exclude_binaries=True,\n"
+            f"    name={executable_name!r},\n"
+            "    console=True,\n"
+            ")\n"
+            "coll = COLLECT(\n"
+            "    exe,\n"
+            "    a.binaries,\n"
+            "    a.datas,\n"
+            f"    name={executable_name!r},\n"
+            ")\n"
+        )
+    with open(spec_path, "w", encoding="utf-8") as f:
+        f.write(header + body)
+
 
 def pack(
     main_file: str,
@@ -242,6 +646,7 @@ def pack(
     source_dir: str = ".",
     intermediate_dir: str = "build",
     dist_dir: str = "dist",
+    _precomputed: Optional[CompileResult] = None,
 ) -> None:
     """
     Use PyInstaller to pack files into a single package.
@@ -257,116 +662,105 @@ def pack(
         source_dir (str): The source directory containing files to package.
         intermediate_dir (str): The directory for intermediate files.
         dist_dir (str): The directory for final package.
+        _precomputed (Optional[CompileResult]): Artifacts from a preceding compile() run; when given, reuse its binary and data file lists instead of rescanning source_dir.
     """
+    # Fresh stat cache per invocation
+    stat_cache: Dict[str, Optional[os.stat_result]] = {}
+
     # Clean directories
     _clean_directory(intermediate_dir)
     _clean_directory(dist_dir)
 
-    # Prepare absolute paths
+    # Prepare absolute paths once; the loops below only join/slice strings
     abs_source_dir = os.path.abspath(source_dir)
+    abs_intermediate_dir = os.path.abspath(intermediate_dir)
+    abs_dist_dir = os.path.abspath(dist_dir)
     abs_main_file = os.path.join(abs_source_dir, main_file)
 
-    # Prepare PyInstaller command
     if not executable_name:
         executable_name = os.path.splitext(os.path.basename(main_file))[0]
 
-    cmd: List[str] = [
-        "pyinstaller",
-        "--name",
-        executable_name,
-        "--distpath",
-        os.path.abspath(dist_dir),
-        "--workpath",
-        os.path.abspath(intermediate_dir),
-        "--specpath",
-        os.path.abspath(intermediate_dir),
-    ]
-
-    if onefile:
-        cmd.append("--onefile")
+    # Scan the tree once for binary files to bundle and data files to add,
+    # unless a preceding compile() already knows what it produced
+    if _precomputed is not None:
+        binary_pairs = _precomputed.binaries
+        expanded_data_files = _precomputed.data_files
     else:
-        cmd.append("--onedir")
-
-    # Add binary files
-    binary_pairs = _find_binary_files(
-        source_dir=os.path.abspath(source_dir), exclude_files=exclude_files
-    )
-    if binary_pairs:
-        for src, dest in binary_pairs:
-            cmd.extend(["--add-binary", f"{src}:{dest}"])
+        _, binary_pairs, expanded_data_files = _scan_source(
+            abs_source_dir, exclude_files, data_files
+        )
 
-    # Add data files
-    expanded_data_files = _expand_wildcards(source_dir, data_files)
+    # Data files as (source, dest) pairs for the spec's Analysis(datas=...)
+    datas: List[Tuple[str, str]] = []
     if expanded_data_files:
         for data in expanded_data_files:
             src_path = os.path.join(abs_source_dir, data)
-            if not os.path.exists(src_path):
+            # One cached stat answers both the existence and the directory check
+            src_stat = _cached_stat(src_path, stat_cache)
+            if src_stat is None:
                 continue
 
-            # Convert to relative path from spec file location
-            rel_path = os.path.relpath(src_path, os.path.abspath(intermediate_dir))
-            dest_path = os.path.dirname(data)
-
-            if os.path.isdir(src_path):
-                # For directories, we need to include all files
-                for root, _, files in os.walk(src_path):
-                    for file in files:
-                        full_path = os.path.join(root, file)
-                        rel_file_path = os.path.relpath(
-                            full_path, os.path.abspath(intermediate_dir)
-                        )
-                        file_dest_path = os.path.relpath(
-                            os.path.dirname(full_path), abs_source_dir
-                        )
-                        cmd.extend(
-                            [
-                                "--add-data",
-                                f"{rel_file_path}:{file_dest_path}",
-                            ]
-                        )
+            if stat.S_ISDIR(src_stat.st_mode):
+                # One entry per directory; PyInstaller recurses into it
+                datas.append((src_path, data))
             else:
                 # For single files
-                cmd.extend(["--add-data", f"{rel_path}:{dest_path}"])
+                datas.append((src_path, os.path.dirname(data) or "."))
 
-    # Add exclude files
+    # Excluded module names, deduplicating overlapping paths that map to the
+    # same module name
+    excluded_modules: List[str] = []
     if exclude_files:
+        seen_modules: Set[str] = set()
         for ex in exclude_files:
-            # Get module name without .py extension
-            module_name = os.path.splitext(ex)[0]
-            # Replace path separators with dots
-            module_name = module_name.replace(os.sep, ".")
-            cmd.extend(["--exclude-module", module_name])
-
-    # Add hidden imports
-    if hidden_imports:
-        for module in hidden_imports:
-            cmd.extend(["--hidden-import", module])
-    elif hidden_imports_from_requirements:
+            # Module name: strip the .py extension, path separators become dots
+            module_name = os.path.splitext(ex)[0].replace(os.sep, ".")
+            if module_name not in seen_modules:
+                seen_modules.add(module_name)
+                excluded_modules.append(module_name)
+
+    # Hidden imports; requirements chains often list the same dependency
+    # several times, so dedup (order-preserving)
+    if not hidden_imports and hidden_imports_from_requirements:
         hidden_imports = _get_hidden_imports_from_requirements(
             hidden_imports_from_requirements
         )
-        for module in hidden_imports:
-            cmd.extend(["--hidden-import", module])
-
-    # Add main script (relative to spec file location)
-    rel_main_path = os.path.relpath(abs_main_file, os.path.abspath(intermediate_dir))
-    cmd.append(rel_main_path)
+    hidden_imports = list(dict.fromkeys(hidden_imports or []))
+
+    # Describe the whole package in a spec file and hand PyInstaller that,
+    # keeping argv constant-size regardless of file counts
+    spec_path = os.path.join(abs_intermediate_dir, f"{executable_name}.spec")
+    _write_spec_file(
+        spec_path,
+        abs_main_file,
+        list(binary_pairs),
+        datas,
+        hidden_imports,
+        excluded_modules,
+        executable_name,
+        bool(onefile),
+    )
 
-    # Change working directory to intermediate_dir to ensure proper path resolution
-    original_dir = os.getcwd()
-    os.makedirs(intermediate_dir, exist_ok=True)
-    os.chdir(intermediate_dir)
+    cmd: List[str] = [
+        "pyinstaller",
+        "--distpath",
+        abs_dist_dir,
+        "--workpath",
+        abs_intermediate_dir,
+        spec_path,
+    ]
 
     try:
         print("Running PyInstaller with command:")
         print(" ".join(cmd))
-        subprocess.run(cmd, check=True)
-        print(f"Packaging complete. Package is in {os.path.abspath(dist_dir)}")
+        # cwd= keeps PyInstaller's path resolution rooted in intermediate_dir
+        # without mutating this process's working directory, so pack() stays
+        # safe to run concurrently for multiple targets
+        subprocess.run(cmd, check=True, cwd=abs_intermediate_dir)
+        print(f"Packaging complete. Package is in {abs_dist_dir}")
     except subprocess.CalledProcessError as e:
         print(f"PyInstaller failed with error: {e}")
         sys.exit(1)
-    finally:
-        os.chdir(original_dir)  # Always restore original working directory
 
 
 def compile_and_pack(
@@ -382,6 +776,10 @@ def compile_and_pack(
     compile_dist_dir: str = "build/compile_dist",
     pack_intermediate_dir: str = "build/pack",
     pack_dist_dir: str = "dist",
+    jobs: Optional[int] = None,
+    incremental: bool = True,
+    force: bool = False,
+    pipeline: bool = False,
 ) -> None:
     """
     First compile with Cython then pack with PyInstaller.
@@ -399,15 +797,23 @@ def compile_and_pack(
         compile_dist_dir (str): The output directory for compiled files.
         pack_intermediate_dir (str): The intermediate directory for packaging.
         pack_dist_dir (str): The output directory for final package.
+        jobs (Optional[int]): The number of parallel jobs for compilation. Defaults to the PYBUILDHELPER_JOBS environment variable or the CPU count.
+        incremental (bool): If True, keep previous compile artifacts so unchanged modules are skipped.
+        force (bool): If True, rebuild everything from scratch.
+        pipeline (bool): If True, overlap Cython code generation and C compilation across module batches.
     """
     # Step 1: Compile with Cython
-    compile(
+    compile_result = compile(
         main_file=main_file,
         data_files=data_files,
         exclude_files=exclude_files,
         source_dir=source_dir,
         intermediate_dir=compile_intermediate_dir,
         dist_dir=compile_dist_dir,
+        jobs=jobs,
+        incremental=incremental,
+        force=force,
+        pipeline=pipeline,
     )
 
     # Step 2: Package with PyInstaller
@@ -422,6 +828,7 @@ def compile_and_pack(
         source_dir=compile_dist_dir,
         intermediate_dir=pack_intermediate_dir,
         dist_dir=pack_dist_dir,
+        _precomputed=compile_result,
     )
 
     print(f"Compilation and packaging complete. Package is in {pack_dist_dir}")
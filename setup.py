@@ -1,9 +1,32 @@
+import os
+
 import setuptools
 
 # Read the long - description from README.md
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
+# Build the compiled scan helpers when the sources are available: cythonize
+# the .pyx when Cython is installed, otherwise compile the pre-generated .c
+# shipped in the sdist. The package falls back to its pure-Python
+# implementations when neither is possible.
+walk_pyx = os.path.join("pybuildhelper", "_walk.pyx")
+walk_c = os.path.join("pybuildhelper", "_walk.c")
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+if cythonize is not None and os.path.exists(walk_pyx):
+    ext_modules = cythonize(
+        [walk_pyx],
+        compiler_directives={"language_level": "3"},
+    )
+elif os.path.exists(walk_c):
+    ext_modules = [setuptools.Extension("pybuildhelper._walk", [walk_c])]
+else:
+    ext_modules = []
+
 # Set up the package information
 setuptools.setup(
     name="pybuildhelper",
@@ -15,6 +38,8 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/xfally/pybuildhelper",
     packages=setuptools.find_packages(),
+    package_data={"pybuildhelper": ["*.pyx", "*.c"]},
+    ext_modules=ext_modules,
     install_requires=[
         "Cython",
         "pyinstaller",